@@ -1,236 +1,606 @@
-# PDF Merger Script with GUI and Logging
-# This script provides a graphical interface to merge certificate PDFs with corresponding challan PDFs.
-# It uses an Excel file to map employees to their challan numbers and provides detailed logging.
-
-# --- Prerequisites ---
-# Before running, you need to install the required Python libraries.
-# You can install them by opening your terminal or command prompt and running:
-# pip install pandas openpyxl pypdf
-
-import os
-import pandas as pd
-from pypdf import PdfWriter
-import tkinter as tk
-from tkinter import ttk, filedialog, scrolledtext
-import logging
-from logging.handlers import QueueHandler
-import queue
-import threading
-import sys
-
-# --- Set up Logging ---
-# This function configures logging to go to both a file and the GUI.
-def setup_logging(log_queue):
-    log_format = '%(asctime)s - %(levelname)s - %(message)s'
-    
-    # Create a root logger
-    logger = logging.getLogger()
-    logger.setLevel(logging.INFO)
-    
-    # Prevent duplicate handlers if this function is called again
-    if logger.hasHandlers():
-        logger.handlers.clear()
-        
-    # 1. File Handler: Saves logs to a file for debugging crashes.
-    file_handler = logging.FileHandler('pdf_merger.log', mode='w')
-    file_handler.setFormatter(logging.Formatter(log_format))
-    logger.addHandler(file_handler)
-    
-    # 2. Queue Handler: Sends logs to the GUI.
-    queue_handler = QueueHandler(log_queue)
-    queue_handler.setFormatter(logging.Formatter(log_format))
-    logger.addHandler(queue_handler)
-
-    # Redirect stdout and stderr to the logger
-    # This ensures that any unexpected errors or prints are also captured.
-    sys.stdout = LogRedirector(logging.INFO)
-    sys.stderr = LogRedirector(logging.ERROR)
-
-class LogRedirector:
-    """A class to redirect stdout/stderr to the logging module."""
-    def __init__(self, level):
-        self.level = level
-
-    def write(self, message):
-        if message.rstrip() != "":
-            logging.log(self.level, message.rstrip())
-
-    def flush(self):
-        pass
-
-# --- Main Application Logic ---
-def merge_pdfs_logic(paths):
-    """The core logic for finding and merging PDFs."""
-    cert_dir, challan_dir, output_dir, excel_file = paths
-    
-    logging.info("Starting the PDF merging process...")
-    logging.info(f"Certificate Directory: {cert_dir}")
-    logging.info(f"Challan Directory: {challan_dir}")
-    logging.info(f"Output Directory: {output_dir}")
-    logging.info(f"Excel File: {excel_file}")
-
-    try:
-        df = pd.read_excel(excel_file, engine='openpyxl')
-        df.columns = [str(col).strip() for col in df.columns]
-        employee_col_name = 'Employee Name'
-        challan_col_name = 'Challan Number'
-
-        if employee_col_name not in df.columns or challan_col_name not in df.columns:
-            logging.error(f"Excel file must contain columns named '{employee_col_name}' and '{challan_col_name}'.")
-            logging.error(f"Found columns: {df.columns.tolist()}")
-            return
-
-        logging.info("Successfully loaded and validated the Excel file.")
-
-    except FileNotFoundError:
-        logging.error(f"The Excel file was not found at {excel_file}")
-        return
-    except Exception as e:
-        logging.error(f"An error occurred while reading the Excel file: {e}", exc_info=True)
-        return
-
-    processed_files = 0
-    total_certs = [f for f in os.listdir(cert_dir) if f.lower().endswith('.pdf')]
-    logging.info(f"Found {len(total_certs)} PDF files in the certificate directory.")
-
-    for cert_filename in total_certs:
-        employee_name = os.path.splitext(cert_filename)[0]
-        logging.info(f"--- Processing certificate for: {employee_name} ---")
-
-        try:
-            employee_challans = df[df[employee_col_name].astype(str).str.strip() == employee_name.strip()]
-
-            if employee_challans.empty:
-                logging.warning(f"No challan entries found for '{employee_name}' in the Excel file. Skipping.")
-                continue
-
-            merger = PdfWriter()
-            
-            cert_path = os.path.join(cert_dir, cert_filename)
-            merger.append(cert_path)
-            logging.info(f"Added certificate: {cert_filename}")
-
-            for _, row in employee_challans.iterrows():
-                challan_num = str(row[challan_col_name]).strip()
-                challan_filename = f"{challan_num}.pdf"
-                challan_path = os.path.join(challan_dir, challan_filename)
-
-                if os.path.exists(challan_path):
-                    try:
-                        merger.append(challan_path)
-                        logging.info(f"  + Added challan: {challan_filename}")
-                    except Exception as e:
-                        logging.warning(f"  - Could not merge challan file {challan_path}. Skipping. Error: {e}")
-                else:
-                    logging.warning(f"  - Challan file not found: {challan_path}. Skipping.")
-            
-            output_filename = f"{employee_name}_combined.pdf"
-            output_path = os.path.join(output_dir, output_filename)
-            
-            with open(output_path, 'wb') as output_file:
-                merger.write(output_file)
-            merger.close()
-            logging.info(f"Successfully created merged file: {output_path}")
-            processed_files += 1
-
-        except Exception as e:
-            logging.error(f"A critical error occurred while processing {employee_name}. Skipping. Error: {e}", exc_info=True)
-            continue
-            
-    logging.info("--- Process Complete ---")
-    logging.info(f"Successfully processed and merged PDFs for {processed_files} out of {len(total_certs)} employees.")
-
-
-# --- GUI Class ---
-class App(tk.Tk):
-    def __init__(self):
-        super().__init__()
-        self.title("PDF Merger")
-        self.geometry("800x600")
-        self.paths = {"cert": tk.StringVar(), "challan": tk.StringVar(), "output": tk.StringVar(), "excel": tk.StringVar()}
-
-        # Set up the main frame
-        main_frame = ttk.Frame(self, padding="10")
-        main_frame.pack(fill=tk.BOTH, expand=True)
-
-        # --- Path Selection UI ---
-        controls_frame = ttk.LabelFrame(main_frame, text="Setup", padding="10")
-        controls_frame.pack(fill=tk.X, expand=False, pady=5)
-        controls_frame.grid_columnconfigure(1, weight=1)
-
-        # Create rows for each path selection
-        self.create_path_row(controls_frame, "Certificate Directory:", self.paths["cert"], 0, self.select_directory)
-        self.create_path_row(controls_frame, "Challan Directory:", self.paths["challan"], 1, self.select_directory)
-        self.create_path_row(controls_frame, "Output Directory:", self.paths["output"], 2, self.select_directory)
-        self.create_path_row(controls_frame, "Excel File:", self.paths["excel"], 3, self.select_file)
-
-        # --- Action Button ---
-        self.start_button = ttk.Button(main_frame, text="Start Merging", command=self.start_processing)
-        self.start_button.pack(pady=10, fill=tk.X)
-
-        # --- Logging Text Area ---
-        log_frame = ttk.LabelFrame(main_frame, text="Log", padding="10")
-        log_frame.pack(fill=tk.BOTH, expand=True)
-        
-        self.log_text = scrolledtext.ScrolledText(log_frame, state='disabled', wrap=tk.WORD, bg="#f0f0f0", fg="black")
-        self.log_text.pack(fill=tk.BOTH, expand=True)
-
-        # --- Setup Logging Queue ---
-        self.log_queue = queue.Queue()
-        setup_logging(self.log_queue)
-        self.after(100, self.process_log_queue)
-
-    def create_path_row(self, parent, label_text, string_var, row, command):
-        ttk.Label(parent, text=label_text).grid(row=row, column=0, sticky="w", padx=5, pady=5)
-        entry = ttk.Entry(parent, textvariable=string_var, state="readonly")
-        entry.grid(row=row, column=1, sticky="ew", padx=5)
-        button = ttk.Button(parent, text="Browse...", command=lambda: command(string_var))
-        button.grid(row=row, column=2, sticky="e", padx=5)
-
-    def select_directory(self, string_var):
-        path = filedialog.askdirectory()
-        if path:
-            string_var.set(path)
-
-    def select_file(self, string_var):
-        path = filedialog.askopenfilename(filetypes=[("Excel files", "*.xlsx *.xls")])
-        if path:
-            string_var.set(path)
-
-    def start_processing(self):
-        # Validate that all paths have been selected
-        if not all(var.get() for var in self.paths.values()):
-            logging.error("All paths must be selected before starting.")
-            return
-
-        self.start_button.config(state="disabled", text="Processing...")
-        
-        # Run the merging logic in a separate thread to keep the GUI responsive
-        paths_tuple = (self.paths["cert"].get(), self.paths["challan"].get(), self.paths["output"].get(), self.paths["excel"].get())
-        processing_thread = threading.Thread(target=self.run_merger_thread, args=(paths_tuple,), daemon=True)
-        processing_thread.start()
-
-    def run_merger_thread(self, paths_tuple):
-        try:
-            merge_pdfs_logic(paths_tuple)
-        except Exception as e:
-            logging.critical(f"An unhandled exception occurred in the processing thread: {e}", exc_info=True)
-        finally:
-            # Re-enable the button once processing is complete
-            self.start_button.config(state="normal", text="Start Merging")
-
-    def process_log_queue(self):
-        """Checks the queue for new log messages and updates the GUI."""
-        while not self.log_queue.empty():
-            record = self.log_queue.get(block=False)
-            msg = logging.getLogger().handlers[1].formatter.format(record) # Get formatter from QueueHandler
-            self.log_text.config(state='normal')
-            self.log_text.insert(tk.END, msg + '\n')
-            self.log_text.config(state='disabled')
-            self.log_text.yview(tk.END)
-        self.after(100, self.process_log_queue)
-
-
-if __name__ == "__main__":
-    app = App()
-    app.mainloop()
+# PDF Merger Script with GUI and Logging
+# This script provides a graphical interface to merge certificate PDFs with corresponding challan PDFs.
+# It uses an Excel file to map employees to their challan numbers and provides detailed logging.
+
+# --- Prerequisites ---
+# Before running, you need to install the required Python libraries.
+# You can install them by opening your terminal or command prompt and running:
+# pip install pandas openpyxl pypdf python-calamine pikepdf
+
+import os
+import io
+import atexit
+import collections
+import contextlib
+import hashlib
+import pickle
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import pandas as pd
+from pypdf import PdfReader, PdfWriter
+try:
+    # pikepdf wraps the C++ QPDF library; merging and saving run as native
+    # code, typically 5-20x faster than pypdf's pure-Python implementation.
+    import pikepdf
+except ImportError:
+    pikepdf = None
+import tkinter as tk
+from tkinter import ttk, filedialog, scrolledtext
+import logging
+from logging.handlers import QueueHandler, QueueListener
+import queue
+import threading
+import sys
+
+# --- Set up Logging ---
+# This function configures logging to go to both a file and the GUI.
+def setup_logging(log_queue):
+    log_format = '%(asctime)s - %(levelname)s - %(message)s'
+
+    # Create a root logger
+    logger = logging.getLogger()
+    logger.setLevel(logging.INFO)
+
+    # Prevent duplicate handlers if this function is called again
+    if logger.hasHandlers():
+        logger.handlers.clear()
+
+    # 1. File Handler: Saves logs to a file for debugging crashes.
+    # The handler sits behind a QueueListener so that logging calls in the
+    # merge loop only enqueue a record and return, instead of blocking on a
+    # synchronous disk write for every message.
+    file_handler = logging.FileHandler('pdf_merger.log', mode='w')
+    file_handler.setFormatter(logging.Formatter(log_format))
+    file_queue = queue.SimpleQueue()
+    logger.addHandler(QueueHandler(file_queue))
+    file_listener = QueueListener(file_queue, file_handler)
+    file_listener.start()
+    atexit.register(file_listener.stop)
+
+    # 2. Queue Handler: Sends logs to the GUI.
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.setFormatter(logging.Formatter(log_format))
+    logger.addHandler(queue_handler)
+
+    # Redirect stdout and stderr to the logger
+    # This ensures that any unexpected errors or prints are also captured.
+    sys.stdout = LogRedirector(logging.INFO)
+    sys.stderr = LogRedirector(logging.ERROR)
+
+class LogRedirector:
+    """A class to redirect stdout/stderr to the logging module."""
+    def __init__(self, level):
+        self.level = level
+
+    def write(self, message):
+        if message.rstrip() != "":
+            logging.log(self.level, message.rstrip())
+
+    def flush(self):
+        pass
+
+# --- Excel Loading ---
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'mergechallan')
+
+def _load_challan_map(excel_file):
+    """Loads the employee -> challan list mapping from the Excel file.
+
+    The parsed mapping is cached on disk keyed by the file's content hash and
+    mtime, so re-running the merge over an unchanged workbook skips the
+    Excel-parsing step entirely. Raises ValueError if the required columns
+    are missing.
+    """
+    data = open(excel_file, 'rb').read()
+    content_hash = hashlib.blake2b(data).hexdigest()[:16]
+    mtime = int(os.path.getmtime(excel_file))
+    basename = os.path.splitext(os.path.basename(excel_file))[0]
+    cache_path = os.path.join(CACHE_DIR, f"{basename}_{content_hash}_{mtime}.pkl")
+
+    if os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'rb') as f:
+                challan_map = pickle.load(f)
+            logging.info(f"Loaded challan mapping from cache: {cache_path}")
+            return challan_map
+        except Exception:
+            logging.warning("Challan mapping cache was unreadable. Re-parsing the Excel file.")
+
+    # calamine (Rust-based) parses xlsx several times faster than openpyxl;
+    # fall back to openpyxl in read-only mode when it is not installed.
+    def _read(**kwargs):
+        try:
+            return pd.read_excel(io.BytesIO(data), engine='calamine', **kwargs)
+        except ImportError:
+            return pd.read_excel(io.BytesIO(data), engine='openpyxl',
+                                 engine_kwargs={'read_only': True}, **kwargs)
+
+    employee_col_name = 'Employee Name'
+    challan_col_name = 'Challan Number'
+
+    # Sniff just the header row first: a workbook missing the required
+    # columns fails in milliseconds instead of after a full parse.
+    header = _read(nrows=0)
+    raw_names = {str(col).strip(): col for col in header.columns}
+    if employee_col_name not in raw_names or challan_col_name not in raw_names:
+        raise ValueError(
+            f"Excel file must contain columns named '{employee_col_name}' and "
+            f"'{challan_col_name}'. Found columns: {header.columns.tolist()}")
+
+    # Full load: read only the two needed columns and pre-type them as
+    # strings, so pandas skips type inference on them and never touches the
+    # unused columns at all.
+    needed = [raw_names[employee_col_name], raw_names[challan_col_name]]
+    df = _read(usecols=needed, dtype={col: 'string' for col in needed})
+    df.columns = [str(col).strip() for col in df.columns]
+
+    # Normalize both columns once, then group challans by employee into a
+    # plain dict. This turns the per-certificate lookup into an O(1) hash
+    # instead of a full-column scan for every certificate. The pyarrow-backed
+    # string dtype strips vectorized over UTF-8 buffers with no per-row Python
+    # objects; without pyarrow, fall back to object-dtype string ops.
+    for col in (employee_col_name, challan_col_name):
+        try:
+            df[col] = df[col].astype('string[pyarrow]').str.strip()
+        except ImportError:
+            df[col] = df[col].astype(str).str.strip()
+    # Zipping the two columns as plain arrays walks the rows once without
+    # boxing a Series per row (iterrows) or running a Python callback per
+    # group (groupby.apply), while keeping each employee's Excel row order.
+    challan_map = {}
+    for employee, challan in zip(df[employee_col_name].to_numpy(),
+                                 df[challan_col_name].to_numpy()):
+        challan_map.setdefault(employee, []).append(challan)
+
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(cache_path, 'wb') as f:
+            pickle.dump(challan_map, f)
+    except OSError as e:
+        logging.warning(f"Could not write the challan mapping cache: {e}")
+
+    return challan_map
+
+# --- Worker Process Support ---
+# Each employee's merge is independent (parse cert, append challans, write
+# output), so the work is farmed out to a process pool. Workers send their
+# log records back to the parent through a multiprocessing queue.
+class _SimpleQueueHandler(QueueHandler):
+    """QueueHandler over a multiprocessing.SimpleQueue.
+
+    SimpleQueue has no put_nowait(); its put() writes straight to the pipe
+    without mp.Queue's feeder thread and buffer lock, so log throughput
+    scales with the number of workers instead of contending on one lock.
+    QueueHandler.prepare() already flattens each record's msg/args to a
+    plain string before it is pickled.
+    """
+    def enqueue(self, record):
+        self.queue.put(record)
+
+def _init_worker(log_queue):
+    """Configures logging in a worker process to forward records to the parent."""
+    logger = logging.getLogger()
+    logger.setLevel(logging.INFO)
+    if logger.hasHandlers():
+        logger.handlers.clear()
+    logger.addHandler(_SimpleQueueHandler(log_queue))
+
+# Each merged output gets a sidecar file recording a signature of the inputs
+# (paths and mtimes) it was built from, so unchanged employees can be skipped
+# on re-runs.
+def _read_signature(output_path):
+    """Returns the recorded input signature for output_path, or None."""
+    try:
+        with open(output_path + '.sig') as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+# Final PDF writes go through a single background writer thread per worker so
+# that writing employee i's output overlaps with parsing employee i+1. The
+# pending deque is bounded to cap the number of serialized PDFs held in memory.
+_writer_pool = None
+_pending_writes = collections.deque()
+_MAX_PENDING_WRITES = 4
+
+def _atomic_write(output_path, data, sig):
+    """Writes a serialized PDF to disk; runs on the worker's writer thread.
+
+    The PDF goes to a sibling .part file that is renamed into place, so a
+    crash mid-write can never leave a truncated PDF under the final name.
+    The signature sidecar is only written once the rename has succeeded.
+    """
+    tmp_path = output_path + '.part'
+    try:
+        with open(tmp_path, 'wb', buffering=1 << 20) as f:
+            f.write(data)
+        os.replace(tmp_path, output_path)
+        with open(output_path + '.sig', 'w') as f:
+            f.write(sig)
+        logging.info(f"Successfully created merged file: {output_path}")
+    except Exception as e:
+        logging.error(f"Failed to write merged file {output_path}: {e}", exc_info=True)
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+
+def _submit_write(output_path, data, sig):
+    """Queues a merged PDF for writing on the background writer thread.
+
+    Blocks only when _MAX_PENDING_WRITES outputs are already in flight. The
+    writer thread is non-daemonic, so queued writes finish before the worker
+    process exits.
+    """
+    global _writer_pool
+    if _writer_pool is None:
+        _writer_pool = ThreadPoolExecutor(max_workers=1)
+    while len(_pending_writes) >= _MAX_PENDING_WRITES:
+        _pending_writes.popleft().result()
+    _pending_writes.append(_writer_pool.submit(_atomic_write, output_path, data, sig))
+
+# Challan PDFs are frequently shared by several employees. Caching the parsed
+# PdfReader per path (one cache per worker process) means each file's xref
+# table and object streams are parsed once per worker, not once per employee.
+_reader_cache = {}
+
+def _cached_reader(path):
+    """Returns a PdfReader for path, parsing the file at most once per worker."""
+    reader = _reader_cache.get(path)
+    if reader is None:
+        reader = PdfReader(path, strict=False)
+        _reader_cache[path] = reader
+    return reader
+
+def _read_file(path):
+    """Reads a whole file; used to overlap source reads on the thread pool."""
+    with open(path, 'rb') as f:
+        return f.read()
+
+def _merge_with_pikepdf(cert_path, challan_paths, output_path, sig):
+    """Merges one employee's PDFs using pikepdf (QPDF)."""
+    # Read all source files concurrently first — the open/read syscalls are
+    # where storage latency hides, especially on network shares — then let
+    # pikepdf parse from memory.
+    with ThreadPoolExecutor(max_workers=4) as tx:
+        blobs = {p: tx.submit(_read_file, p) for p in [cert_path] + challan_paths}
+
+    # Every source Pdf stays open until save(): pikepdf then references the
+    # sources' stream data instead of cloning it when pages are appended, and
+    # resources shared between sources (template fonts, images) are written
+    # once in the output rather than re-serialized per page.
+    with contextlib.ExitStack() as stack:
+        out = stack.enter_context(pikepdf.Pdf.new())
+        src = stack.enter_context(pikepdf.open(io.BytesIO(blobs[cert_path].result())))
+        out.pages.extend(src.pages)
+        logging.info(f"Added certificate: {os.path.basename(cert_path)}")
+
+        for challan_path in challan_paths:
+            try:
+                src = stack.enter_context(pikepdf.open(io.BytesIO(blobs[challan_path].result())))
+                out.pages.extend(src.pages)
+                logging.info(f"  + Added challan: {os.path.basename(challan_path)}")
+            except Exception as e:
+                logging.warning(f"  - Could not merge challan file {challan_path}. Skipping. Error: {e}")
+
+        # Packing objects into object streams and recompressing uncompressed
+        # streams shrinks the output 20-60%, which is bytes the writer thread
+        # never has to push to disk.
+        buf = io.BytesIO()
+        out.save(buf, linearize=False,
+                 object_stream_mode=pikepdf.ObjectStreamMode.generate,
+                 compress_streams=True,
+                 stream_decode_level=pikepdf.StreamDecodeLevel.generalized)
+        _submit_write(output_path, buf.getvalue(), sig)
+
+def _prefetch_reader(path):
+    """Parses path into the reader cache, ignoring errors.
+
+    A file that fails to parse here is simply retried (and the error logged)
+    when the serial append loop reaches it.
+    """
+    try:
+        _reader_cache[path] = PdfReader(path, strict=False)
+    except Exception:
+        pass
+
+def _merge_with_pypdf(cert_path, challan_paths, output_path, sig):
+    """Merges one employee's PDFs using pypdf (fallback when pikepdf is absent)."""
+    # Parse the certificate and any uncached challans on a small thread pool
+    # first. The file reads and zlib decompression under PdfReader release
+    # the GIL, so overlapping them hides disk latency; the appends themselves
+    # stay serial because PdfWriter is not thread-safe.
+    uncached = [p for p in challan_paths if p not in _reader_cache]
+    with ThreadPoolExecutor(max_workers=4) as tx:
+        cert_future = tx.submit(PdfReader, cert_path, strict=False)
+        list(tx.map(_prefetch_reader, uncached))
+
+    # A fresh PdfWriter per employee is deliberate: its internal id-translation
+    # tables map source objects to slots in that writer's own object table, so
+    # they cannot be shared across outputs. Cross-employee reuse happens one
+    # level down instead, in the per-worker reader cache, which keeps the
+    # parsed form of every shared source (template certs, repeated challans).
+    merger = PdfWriter()
+
+    merger.append(cert_future.result())
+    logging.info(f"Added certificate: {os.path.basename(cert_path)}")
+
+    for challan_path in challan_paths:
+        try:
+            merger.append_pages_from_reader(_cached_reader(challan_path))
+            logging.info(f"  + Added challan: {os.path.basename(challan_path)}")
+        except Exception as e:
+            logging.warning(f"  - Could not merge challan file {challan_path}. Skipping. Error: {e}")
+
+    buf = io.BytesIO()
+    merger.write(buf)
+    merger.close()
+    _submit_write(output_path, buf.getvalue(), sig)
+
+def _merge_one(task):
+    """Merges one employee's certificate with their challans.
+
+    Takes a (employee_name, cert_path, challan_paths, output_path) tuple and
+    returns (employee_name, success) so the parent can tally results.
+    """
+    employee_name, cert_path, challan_paths, output_path, sig = task
+    logging.info(f"--- Processing certificate for: {employee_name} ---")
+
+    try:
+        if pikepdf is not None:
+            _merge_with_pikepdf(cert_path, challan_paths, output_path, sig)
+        else:
+            _merge_with_pypdf(cert_path, challan_paths, output_path, sig)
+        return (employee_name, True)
+
+    except Exception as e:
+        logging.error(f"A critical error occurred while processing {employee_name}. Skipping. Error: {e}", exc_info=True)
+        return (employee_name, False)
+
+# --- Main Application Logic ---
+def merge_pdfs_logic(paths, force_rebuild=False):
+    """The core logic for finding and merging PDFs.
+
+    With force_rebuild set, every employee is re-merged even when the
+    existing output is up-to-date with its inputs.
+    """
+    cert_dir, challan_dir, output_dir, excel_file = paths
+
+    logging.info("Starting the PDF merging process...")
+    logging.info(f"Certificate Directory: {cert_dir}")
+    logging.info(f"Challan Directory: {challan_dir}")
+    logging.info(f"Output Directory: {output_dir}")
+    logging.info(f"Excel File: {excel_file}")
+
+    try:
+        challan_map = _load_challan_map(excel_file)
+        logging.info("Successfully loaded and validated the Excel file.")
+
+    except FileNotFoundError:
+        logging.error(f"The Excel file was not found at {excel_file}")
+        return
+    except ValueError as e:
+        logging.error(str(e))
+        return
+    except Exception as e:
+        logging.error(f"An error occurred while reading the Excel file: {e}", exc_info=True)
+        return
+
+    # scandir gives us name, path and a cheap stat per entry in one pass,
+    # avoiding the extra join/stat calls that listdir + os.path.exists would
+    # need. The mtimes feed the up-to-date signature below.
+    with os.scandir(cert_dir) as it:
+        total_certs = [(e.name, e.path, e.stat().st_mtime_ns) for e in it
+                       if e.is_file() and e.name.lower().endswith('.pdf')]
+    logging.info(f"Found {len(total_certs)} PDF files in the certificate directory.")
+
+    # Index the challan directory once so each challan lookup is a dict hit
+    # instead of a per-file stat syscall. Keys are lowercased so lookups work
+    # the same on case-insensitive and case-sensitive filesystems.
+    with os.scandir(challan_dir) as it:
+        challan_index = {e.name.lower(): (e.path, e.stat().st_mtime_ns) for e in it
+                         if e.is_file() and e.name.lower().endswith('.pdf')}
+
+    # One scandir of the output directory answers every "does the output
+    # already exist" question for the up-to-date check below.
+    existing_outputs = frozenset()
+    if not force_rebuild:
+        with os.scandir(output_dir) as it:
+            existing_outputs = {e.name for e in it if e.is_file()}
+
+    # Build the full task list up front so the workers only do PDF work.
+    # An employee whose inputs are unchanged since the existing output was
+    # written (tracked by a signature sidecar next to the output) is skipped,
+    # so re-runs only process the employees whose inputs actually changed.
+    tasks = []
+    skipped_files = 0
+    for cert_filename, cert_path, cert_mtime in total_certs:
+        employee_name = os.path.splitext(cert_filename)[0]
+
+        employee_challans = challan_map.get(employee_name.strip())
+
+        if not employee_challans:
+            logging.warning(f"No challan entries found for '{employee_name}' in the Excel file. Skipping.")
+            continue
+
+        challan_paths = []
+        sig_parts = [f"{cert_path}:{cert_mtime}"]
+        for challan_num in employee_challans:
+            entry = challan_index.get(f"{challan_num}.pdf".lower())
+
+            if entry is not None:
+                challan_paths.append(entry[0])
+                sig_parts.append(f"{entry[0]}:{entry[1]}")
+            else:
+                logging.warning(f"  - Challan file not found: {challan_num}.pdf. Skipping.")
+
+        output_path = os.path.join(output_dir, f"{employee_name}_combined.pdf")
+        sig = hashlib.blake2b('\n'.join(sig_parts).encode()).hexdigest()
+
+        if (os.path.basename(output_path) in existing_outputs
+                and sig == _read_signature(output_path)):
+            logging.info(f"Output for '{employee_name}' is up-to-date. Skipping.")
+            skipped_files += 1
+            continue
+
+        tasks.append((employee_name, cert_path, challan_paths, output_path, sig))
+
+    # Fan the per-employee merges out across CPU cores. pypdf's parsing and
+    # serialization are pure Python, so processes (not threads) are needed to
+    # get real parallelism. Worker logs travel back over worker_log_queue and
+    # are re-dispatched into the handlers set up by setup_logging().
+    processed_files = 0
+    worker_log_queue = multiprocessing.SimpleQueue()
+
+    def _forward_worker_logs():
+        # QueueListener cannot drive a SimpleQueue (its get() takes no block
+        # argument), so a plain thread forwards records into the root logger's
+        # handlers until the None sentinel arrives.
+        while True:
+            record = worker_log_queue.get()
+            if record is None:
+                break
+            logging.getLogger().handle(record)
+
+    log_listener = threading.Thread(target=_forward_worker_logs, daemon=True)
+    log_listener.start()
+    try:
+        with ProcessPoolExecutor(max_workers=os.cpu_count(),
+                                 initializer=_init_worker,
+                                 initargs=(worker_log_queue,)) as executor:
+            for employee_name, success in executor.map(_merge_one, tasks, chunksize=4):
+                if success:
+                    processed_files += 1
+    finally:
+        worker_log_queue.put(None)
+        log_listener.join()
+
+    logging.info("--- Process Complete ---")
+    if skipped_files:
+        logging.info(f"Skipped {skipped_files} employees whose outputs were already up-to-date.")
+    logging.info(f"Successfully processed and merged PDFs for {processed_files} out of {len(total_certs)} employees.")
+
+
+# --- GUI Class ---
+class App(tk.Tk):
+    def __init__(self):
+        super().__init__()
+        self.title("PDF Merger")
+        self.geometry("800x600")
+        self.paths = {"cert": tk.StringVar(), "challan": tk.StringVar(), "output": tk.StringVar(), "excel": tk.StringVar()}
+
+        # Set up the main frame
+        main_frame = ttk.Frame(self, padding="10")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+
+        # --- Path Selection UI ---
+        controls_frame = ttk.LabelFrame(main_frame, text="Setup", padding="10")
+        controls_frame.pack(fill=tk.X, expand=False, pady=5)
+        controls_frame.grid_columnconfigure(1, weight=1)
+
+        # Create rows for each path selection
+        self.create_path_row(controls_frame, "Certificate Directory:", self.paths["cert"], 0, self.select_directory)
+        self.create_path_row(controls_frame, "Challan Directory:", self.paths["challan"], 1, self.select_directory)
+        self.create_path_row(controls_frame, "Output Directory:", self.paths["output"], 2, self.select_directory)
+        self.create_path_row(controls_frame, "Excel File:", self.paths["excel"], 3, self.select_file)
+
+        # --- Action Button ---
+        self.force_rebuild = tk.BooleanVar(value=False)
+        force_check = ttk.Checkbutton(main_frame, text="Force rebuild (re-merge up-to-date outputs)",
+                                      variable=self.force_rebuild)
+        force_check.pack(anchor="w", pady=(5, 0))
+
+        self.start_button = ttk.Button(main_frame, text="Start Merging", command=self.start_processing)
+        self.start_button.pack(pady=10, fill=tk.X)
+
+        # --- Logging Text Area ---
+        log_frame = ttk.LabelFrame(main_frame, text="Log", padding="10")
+        log_frame.pack(fill=tk.BOTH, expand=True)
+        
+        self.log_text = scrolledtext.ScrolledText(log_frame, state='disabled', wrap=tk.WORD, bg="#f0f0f0", fg="black")
+        self.log_text.pack(fill=tk.BOTH, expand=True)
+
+        # --- Setup Logging Queue ---
+        self.log_queue = queue.Queue()
+        setup_logging(self.log_queue)
+        # Cache the GUI handler's formatter once instead of re-resolving it
+        # for every record in process_log_queue.
+        self._log_formatter = logging.getLogger().handlers[1].formatter
+        self._processing = False
+        self._log_polling = False
+        self._ensure_log_polling()
+
+    def create_path_row(self, parent, label_text, string_var, row, command):
+        ttk.Label(parent, text=label_text).grid(row=row, column=0, sticky="w", padx=5, pady=5)
+        entry = ttk.Entry(parent, textvariable=string_var, state="readonly")
+        entry.grid(row=row, column=1, sticky="ew", padx=5)
+        button = ttk.Button(parent, text="Browse...", command=lambda: command(string_var))
+        button.grid(row=row, column=2, sticky="e", padx=5)
+
+    def select_directory(self, string_var):
+        path = filedialog.askdirectory()
+        if path:
+            string_var.set(path)
+
+    def select_file(self, string_var):
+        path = filedialog.askopenfilename(filetypes=[("Excel files", "*.xlsx *.xls")])
+        if path:
+            string_var.set(path)
+
+    def start_processing(self):
+        # Validate that all paths have been selected
+        if not all(var.get() for var in self.paths.values()):
+            logging.error("All paths must be selected before starting.")
+            self._ensure_log_polling()
+            return
+
+        self.start_button.config(state="disabled", text="Processing...")
+        self._processing = True
+        self._ensure_log_polling()
+
+        # Run the merging logic in a separate thread to keep the GUI responsive
+        paths_tuple = (self.paths["cert"].get(), self.paths["challan"].get(), self.paths["output"].get(), self.paths["excel"].get())
+        processing_thread = threading.Thread(target=self.run_merger_thread,
+                                             args=(paths_tuple, self.force_rebuild.get()),
+                                             daemon=True)
+        processing_thread.start()
+
+    def run_merger_thread(self, paths_tuple, force_rebuild):
+        try:
+            merge_pdfs_logic(paths_tuple, force_rebuild=force_rebuild)
+        except Exception as e:
+            logging.critical(f"An unhandled exception occurred in the processing thread: {e}", exc_info=True)
+        finally:
+            # Re-enable the button once processing is complete
+            self._processing = False
+            self.start_button.config(state="normal", text="Start Merging")
+
+    def _ensure_log_polling(self):
+        """Starts the log-queue poll loop if it is not already running."""
+        if not self._log_polling:
+            self._log_polling = True
+            self.after(100, self.process_log_queue)
+
+    def process_log_queue(self):
+        """Drains the queue and updates the GUI with one insert per batch."""
+        messages = []
+        while not self.log_queue.empty():
+            record = self.log_queue.get(block=False)
+            messages.append(self._log_formatter.format(record))
+
+        if messages:
+            # A single insert per tick keeps Tk redraws at O(ticks) rather
+            # than O(records) during bursty logging.
+            self.log_text.config(state='normal')
+            self.log_text.insert(tk.END, '\n'.join(messages) + '\n')
+            self.log_text.config(state='disabled')
+            self.log_text.yview(tk.END)
+
+        # Keep polling while a merge is running or records are still arriving;
+        # otherwise go idle until the next start_processing call.
+        if self._processing or messages:
+            self.after(100, self.process_log_queue)
+        else:
+            self._log_polling = False
+
+
+if __name__ == "__main__":
+    app = App()
+    app.mainloop()